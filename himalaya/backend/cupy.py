@@ -79,6 +79,8 @@ float32 = cupy.float32
 float64 = cupy.float64
 int32 = cupy.int32
 eigh = cupy.linalg.eigh
+eigvalsh = cupy.linalg.eigvalsh
+cholesky = cupy.linalg.cholesky
 norm = cupy.linalg.norm
 log = cupy.log
 exp = cupy.exp
@@ -97,6 +99,7 @@ flip = cupy.flip
 atleast_1d = cupy.atleast_1d
 finfo = cupy.finfo
 eye = cupy.eye
+minimum = cupy.minimum
 
 
 def diagonal_view(array, axis1=0, axis2=1):
@@ -210,3 +213,10 @@ def svd(X, full_matrices=True):
         return map(cupy.stack, zip(*UsV_list))
     else:
         raise NotImplementedError()
+
+
+def cho_solve(L, B):
+    """Solve A @ X = B, given the lower Cholesky factor L of A."""
+    from cupyx.scipy.linalg import solve_triangular
+    Z = solve_triangular(L, B, lower=True)
+    return solve_triangular(L, Z, lower=True, trans="T")
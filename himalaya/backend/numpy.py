@@ -76,6 +76,8 @@ float32 = np.float32
 float64 = np.float64
 int32 = np.int32
 eigh = linalg.eigh
+eigvalsh = np.linalg.eigvalsh
+cholesky = np.linalg.cholesky
 norm = linalg.norm
 log = np.log
 exp = np.exp
@@ -96,6 +98,7 @@ flip = np.flip
 atleast_1d = np.atleast_1d
 finfo = np.finfo
 eye = np.eye
+minimum = np.minimum
 
 
 def diagonal_view(array, axis1=0, axis2=1):
@@ -211,3 +214,10 @@ def svd(X, full_matrices=True):
         return map(np.stack, zip(*UsV_list))
     else:
         raise NotImplementedError()
+
+
+def cho_solve(L, B):
+    """Solve A @ X = B, given the lower Cholesky factor L of A."""
+    if use_scipy:
+        return linalg.cho_solve((L, True), B)
+    return linalg.solve(L.T, linalg.solve(L, B))
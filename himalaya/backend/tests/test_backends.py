@@ -108,6 +108,36 @@ def test_eigh(backend):
             assert_array_almost_equal(vectors[:, ii], -vectors_ref[:, ii])
 
 
+@pytest.mark.parametrize('backend', ALL_BACKENDS)
+def test_eigvalsh(backend):
+    import numpy.linalg
+    backend = set_backend(backend)
+
+    array = backend.randn(3, 10, 20)
+    array = backend.asarray(array, dtype='float64')
+    kernels = backend.matmul(array, backend.transpose(array, (0, 2, 1)))
+
+    values = backend.eigvalsh(kernels)
+    values_ref = numpy.linalg.eigvalsh(backend.to_numpy(kernels))
+    assert_array_almost_equal(values, values_ref)
+
+
+@pytest.mark.parametrize('backend', ALL_BACKENDS)
+def test_cholesky_cho_solve(backend):
+    backend = set_backend(backend)
+
+    array = backend.randn(10, 20)
+    array = backend.asarray(array, dtype='float64')
+    kernel = backend.matmul(array, backend.transpose(array, (1, 0)))
+    B = backend.asarray(backend.randn(10, 3), dtype='float64')
+
+    L = backend.cholesky(kernel)
+    assert_array_almost_equal(backend.matmul(L, backend.transpose(L, (1, 0))),
+                              kernel)
+    X = backend.cho_solve(L, B)
+    assert_array_almost_equal(backend.matmul(kernel, X), B)
+
+
 @pytest.mark.parametrize('backend', ALL_BACKENDS)
 @pytest.mark.parametrize('full_matrices', [True, False])
 @pytest.mark.parametrize('three_dim', [True, False])
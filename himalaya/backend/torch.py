@@ -103,6 +103,7 @@ sign = torch.sign
 clip = torch.clamp
 finfo = torch.finfo
 eye = torch.eye
+minimum = torch.minimum
 
 
 def atleast_1d(array):
@@ -310,3 +311,24 @@ try:
 except AttributeError:
     # torch.__version__ < 1.8
     eigh = partial(torch.symeig, eigenvectors=True)
+
+
+try:
+    eigvalsh = torch.linalg.eigvalsh
+except AttributeError:
+    # torch.__version__ < 1.8
+
+    def eigvalsh(X):
+        return torch.symeig(X, eigenvectors=False)[0]
+
+
+try:
+    cholesky = torch.linalg.cholesky
+except AttributeError:
+    # torch.__version__ < 1.8
+    cholesky = torch.cholesky
+
+
+def cho_solve(L, B):
+    """Solve A @ X = B, given the lower Cholesky factor L of A."""
+    return torch.cholesky_solve(B, L)
@@ -1,6 +1,7 @@
 from ._solvers import solve_weighted_kernel_ridge_gradient_descent
 from ._solvers import solve_weighted_kernel_ridge_conjugate_gradient
 from ._solvers import solve_weighted_kernel_ridge_neumann_series
+from ._solvers import solve_weighted_kernel_ridge_cholesky
 from ._solvers import solve_kernel_ridge_eigenvalues
 from ._solvers import solve_kernel_ridge_gradient_descent
 from ._solvers import solve_kernel_ridge_conjugate_gradient
@@ -37,6 +38,7 @@ __all__ = [
     "solve_weighted_kernel_ridge_gradient_descent",
     "solve_weighted_kernel_ridge_conjugate_gradient",
     "solve_weighted_kernel_ridge_neumann_series",
+    "solve_weighted_kernel_ridge_cholesky",
     "solve_kernel_ridge_cv_eigenvalues",
     "solve_kernel_ridge_cv_svd",
     "solve_kernel_ridge_eigenvalues",
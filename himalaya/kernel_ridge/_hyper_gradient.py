@@ -1,5 +1,9 @@
 import numbers
 
+import numpy as np
+from joblib import Parallel
+from joblib import delayed
+
 from ..backend import get_backend
 from ..progress_bar import ProgressBar
 from ..utils import compute_lipschitz_constants
@@ -9,8 +13,17 @@ from ..validation import check_cv
 from ._solvers import solve_weighted_kernel_ridge_conjugate_gradient
 from ._solvers import solve_weighted_kernel_ridge_gradient_descent
 from ._solvers import solve_weighted_kernel_ridge_neumann_series
+from ._solvers import solve_weighted_kernel_ridge_cholesky
+from ._solvers import _solve_weighted_kernel_ridge_conjugate_gradient_splits
 from ._random_search import solve_multiple_kernel_ridge_random_search
 
+#: With refit_method="auto", the refit uses Cholesky factorizations only if
+#: n_samples is at most _MAX_N_SAMPLES_CHOLESKY, and if each factorization is
+#: shared on average by at least _MIN_TARGETS_PER_CHOLESKY targets (targets
+#: with identical deltas share the same factorization).
+_MAX_N_SAMPLES_CHOLESKY = 1000
+_MIN_TARGETS_PER_CHOLESKY = 10
+
 
 def solve_multiple_kernel_ridge_hyper_gradient(
     Ks,
@@ -32,6 +45,10 @@ def solve_multiple_kernel_ridge_hyper_gradient(
     random_state=None,
     progress_bar=True,
     Y_in_cpu=False,
+    n_jobs=None,
+    refit_method="conjugate_gradient",
+    dtype=None,
+    cache_split_kernels=False,
 ):
     """Solve bilinear kernel ridge regression with cross-validation.
 
@@ -85,6 +102,31 @@ def solve_multiple_kernel_ridge_hyper_gradient(
         If True, display a progress bar over batches and iterations.
     Y_in_cpu : bool
         If True, keep the target values ``Y`` in CPU memory (slower).
+    n_jobs : int, default=None
+        Number of threads used to process the cross-validation splits in
+        parallel. ``None`` means 1 unless in a :obj:`joblib.parallel_backend`
+        context. ``-1`` means using all processors.
+        n_jobs does not speed up GPU backends.
+    refit_method : str, "conjugate_gradient", "cholesky", or "auto"
+        Algorithm used to refit the dual weights on the entire dataset.
+        "cholesky" factorizes the kernel once per unique column of deltas, so
+        it is only faster when many targets share the same deltas. If "auto",
+        use "cholesky" on a batch of targets when n_samples is at most 1000
+        and there are at least 10 targets per unique column of deltas, and
+        "conjugate_gradient" otherwise.
+    dtype : None or "mixed"
+        If None, all computations use the dtype of Ks. If "mixed", the
+        cross-validation loop (dual weights, hyper-gradients) is computed in
+        float32, and only the final refit uses the dtype of Ks. The returned
+        deltas are cast back to the dtype of Ks. The float32 copy of Ks is
+        kept in memory during the cross-validation loop.
+    cache_split_kernels : bool
+        If False (default), the kernels of each cross-validation split are
+        gathered from Ks every time they are used. If True, they are gathered
+        once and kept in memory for the whole call, which is faster but costs
+        about (n_splits - 1) times the memory of Ks, on top of Ks itself
+        (e.g. about 4x with cv=5, and 9x with cv=10). Only use it when this
+        fits in memory.
 
     Returns
     -------
@@ -108,6 +150,10 @@ def solve_multiple_kernel_ridge_hyper_gradient(
     if n_targets_batch is None:
         n_targets_batch = n_targets
 
+    if dtype not in (None, "mixed"):
+        raise ValueError("Unknown parameter dtype=%r." % (dtype,))
+    mixed = dtype == "mixed"
+
     Ks = backend.asarray(Ks)
     dtype = Ks.dtype
     device = getattr(Ks, "device", None)
@@ -118,16 +164,74 @@ def solve_multiple_kernel_ridge_hyper_gradient(
 
     cv = check_cv(cv, Y)
     n_splits = cv.get_n_splits()
-    for train, val in cv.split(Y):
+    splits = list(cv.split(Y))
+    for train, val in splits:
         if len(val) == 0 or len(train) == 0:
             raise ValueError(
                 "Empty train or validation set. "
                 "Check that `cv` is correctly defined."
             )
 
+    # with dtype="mixed", the cross-validation loop runs in float32
+    Ks_cv = backend.asarray(Ks, dtype="float32") if mixed else Ks
+
+    train_folds, val_folds, train_val_folds = [], [], []
+    for train, val in splits:
+        train_val = np.concatenate([train, val])
+        train_val_folds.append(backend.to_gpu(train_val, device=device))
+        train_folds.append(backend.to_gpu(train, device=device))
+        val_folds.append(backend.to_gpu(val, device=device))
+    n_samples_train_folds = [len(train) for train in train_folds]
+
+    if cache_split_kernels:
+        # precompute the kernels of each split, which do not depend on the
+        # batch of targets nor on the iteration. The training kernels and the
+        # validation cross-kernels are stored in a single array, such that
+        # Ks_train_val @ dual_weights gives chi on both sets with one matmul.
+        # When all splits have the same sizes (e.g. KFold with n_samples
+        # divisible by n_splits), the splits are also stacked in a single
+        # array, such that chi is computed on all splits with one batched
+        # matmul.
+        equal_splits = (
+            len(set(n_samples_train_folds)) == 1
+            and len(set(len(val) for val in val_folds)) == 1
+        )
+        if equal_splits:
+            Ks_train_val_stack = backend.zeros_like(
+                Ks_cv,
+                shape=(n_splits, Ks.shape[0], n_samples, n_samples_train_folds[0]),
+            )
+        else:
+            Ks_train_val_stack = None
+
+        Ks_train_val_folds, Ks_train_folds, Ks_val_folds = [], [], []
+        for kk, (train, train_val) in enumerate(zip(train_folds, train_val_folds)):
+            if Ks_train_val_stack is not None:
+                Ks_train_val_stack[kk] = Ks_cv[:, train_val[:, None], train]
+                Ks_train_val = Ks_train_val_stack[kk]
+            else:
+                Ks_train_val = Ks_cv[:, train_val[:, None], train]
+            Ks_train_val_folds.append(Ks_train_val)
+            Ks_train_folds.append(Ks_train_val[:, : len(train)])
+            Ks_val_folds.append(Ks_train_val[:, len(train) :])
+    else:
+        # gather the kernels of each split from Ks on each access
+        Ks_train_val_stack = None
+        Ks_train_val_folds = _SplitKernels(Ks_cv, train_val_folds, train_folds)
+        Ks_train_folds = _SplitKernels(Ks_cv, train_folds, train_folds)
+        Ks_val_folds = _SplitKernels(Ks_cv, val_folds, train_folds)
+
+    # The stacked splits can also be solved with a single conjugate gradient.
+    # It is only used on GPU, where it saves kernel launches: on CPU, the
+    # batched matmuls are slower than solving each split separately.
+    Ks_train_stack = None
+    if Ks_train_val_stack is not None and backend.is_in_gpu(Ks_cv):
+        Ks_train_stack = Ks_train_val_stack[:, :, : n_samples_train_folds[0]]
+
     deltas = _init_multiple_kernel_ridge(
-        Ks, Y, initial_deltas, cv, n_targets_batch=n_targets_batch, Y_in_cpu=Y_in_cpu
+        Ks_cv, Y, initial_deltas, cv, n_targets_batch=n_targets_batch, Y_in_cpu=Y_in_cpu
     )
+    max_deltas = np.log(backend.finfo(deltas.dtype).max)
 
     if return_weights == "primal":
         if Xs is None:
@@ -146,6 +250,9 @@ def solve_multiple_kernel_ridge_hyper_gradient(
     else:
         raise ValueError("Unknown parameter return_weights=%r." % (return_weights,))
 
+    if refit_method not in ("auto", "cholesky", "conjugate_gradient"):
+        raise ValueError("Unknown parameter refit_method=%r." % (refit_method,))
+
     lipschitz_constants = None
     name = "hypergradient_" + hyper_gradient_method
     if kernel_ridge_method == "conjugate_gradient":
@@ -154,18 +261,20 @@ def solve_multiple_kernel_ridge_hyper_gradient(
         inner_function = solve_weighted_kernel_ridge_gradient_descent
 
         # precompute the lipschitz constants
-        lipschitz_constants = []
-        for train, _ in cv.split(Y):
-            train = backend.to_gpu(train, device=device)
-            Ks_train = Ks[:, train[:, None], train]
-            lipschitz_constants.append(
-                compute_lipschitz_constants(Ks_train, random_state=random_state)
-            )
+        lipschitz_constants = [
+            compute_lipschitz_constants(Ks_train, random_state=random_state)
+            for Ks_train in Ks_train_folds
+        ]
     else:
         raise ValueError(
             "Unknown parameter kernel_ridge_method=%r." % (kernel_ridge_method,)
         )
 
+    if hyper_gradient_method not in ("conjugate_gradient", "neumann", "direct"):
+        raise ValueError(
+            "Unknown parameter hyper_gradient_method=%r." % (hyper_gradient_method,)
+        )
+
     if isinstance(cg_tol, (int, float)):
         cg_tol = backend.full_like(Y, shape=(max_iter,), fill_value=cg_tol)
 
@@ -179,145 +288,260 @@ def solve_multiple_kernel_ridge_hyper_gradient(
     bar = None
     if progress_bar:
         bar = ProgressBar(title=name, max_value=len(batch_iterates) * max_iter)
-    for bb, start in enumerate(batch_iterates):
-        batch = slice(start, start + n_targets_batch)
-        Y_batch = backend.to_gpu(Y[:, batch], device=device)
-
-        previous_solutions = [None] * n_splits
-        step_sizes = [None] * n_splits
-        dual_weights_cv = [None] * n_splits
-
-        for ii in range(max_iter):
-            if progress_bar:
-                bar.update(bb * max_iter + ii)
-
-            ##########################
-            # updates the dual weights
-
-            # First pass needs more iterations to have something reasonable.
-            # We also use conjugate gradient as it converges faster.
-            if ii == 0:
-                max_iter_inner_dual_ = 50
-                cg_tol_ = min(1e-2, cg_tol[ii])
-                inner_function_ = solve_weighted_kernel_ridge_conjugate_gradient  # noqa
+    # threads share the kernels and the targets, instead of copying them
+    with Parallel(n_jobs=n_jobs, require="sharedmem") as parallel:
+        for bb, start in enumerate(batch_iterates):
+            batch = slice(start, start + n_targets_batch)
+            Y_batch = backend.to_gpu(Y[:, batch], device=device)
+            # the targets of each split do not depend on the iteration
+            Y_batch_cv = backend.asarray(Y_batch, dtype="float32") if mixed else Y_batch
+            Y_train_folds = [Y_batch_cv[train] for train in train_folds]
+            Y_val_folds = [Y_batch_cv[val] for val in val_folds]
+            if Ks_train_stack is not None:
+                Y_train_stack = backend.stack(Y_train_folds)
             else:
-                max_iter_inner_dual_ = max_iter_inner_dual
-                cg_tol_ = cg_tol[ii]
-                inner_function_ = inner_function
-
-            for kk, (train, val) in enumerate(cv.split(Y)):
-                train = backend.to_gpu(train, device=device)
-                Ks_train = Ks[:, train[:, None], train]
-                Y_train = Y_batch[train]
-
-                if kernel_ridge_method == "gradient_descent" and ii != 0:
-                    kwargs = dict(lipschitz_Ks=lipschitz_constants[kk])
+                Y_train_stack = None
+            # targets that have not converged yet, and their deltas
+            active = np.arange(n_targets)[batch]
+            deltas_batch = backend.copy(deltas[:, batch])
+            # exp(deltas) is cached, and updated along with deltas
+            exp_deltas = backend.exp(deltas_batch)
+
+            previous_solutions = [None] * n_splits
+            # Each split is warm started from its dual weights of the previous
+            # outer iteration. The conjugate gradient residual and direction
+            # are not kept: they are only valid for fixed deltas, and the
+            # deltas change at every outer iteration.
+            dual_weights_cv = [None] * n_splits
+
+            for ii in range(max_iter):
+                if progress_bar:
+                    bar.update(bb * max_iter + ii)
+
+                ##########################
+                # updates the dual weights
+
+                # First pass needs more iterations to have something reasonable.
+                # We also use conjugate gradient as it converges faster.
+                # (Warm starting the splits from a full-data fit, restricted to
+                # the training samples, only saves one or two conjugate gradient
+                # iterations per split, which is less than the cost of the
+                # full-data fit itself. Later passes are warm started from the
+                # previous solution of each split, which is a better start.)
+                if ii == 0:
+                    max_iter_inner_dual_ = 50
+                    cg_tol_ = min(1e-2, cg_tol[ii])
+                    inner_function_ = solve_weighted_kernel_ridge_conjugate_gradient  # noqa
                 else:
-                    kwargs = dict()
-
-                dual_weights_cv[kk] = inner_function_(
-                    Ks_train,
-                    Y_train,
-                    deltas[:, batch],
-                    initial_dual_weights=dual_weights_cv[kk],
-                    alpha=alpha,
-                    max_iter=max_iter_inner_dual_,
-                    tol=cg_tol_,
-                    **kwargs,
-                )
-
-            ###################
-            # update the deltas
-            deltas_old = backend.copy(deltas[:, batch])
-            for jj in range(max_iter_inner_hyper):
-                gradients = backend.zeros_like(deltas[:, batch])
-                scores = backend.zeros_like(
-                    Ks, shape=(n_splits, deltas[:, batch].shape[1])
-                )
-                for kk, (train, val) in enumerate(cv.split(Y)):
-                    val = backend.to_gpu(val, device=device)
-                    train = backend.to_gpu(train, device=device)
-
-                    Ks_val = Ks[:, val[:, None], train]
-                    Ks_train = Ks[:, train[:, None], train]
-                    Y_val = Y_batch[val]
-
-                    (
-                        gradients_kk,
-                        step_sizes[kk],
-                        predictions,
-                        previous_solutions[kk],
-                    ) = _compute_delta_gradient(
-                        Ks_val=Ks_val,
-                        Y_val=Y_val,
-                        deltas=deltas[:, batch],
-                        dual_weights=dual_weights_cv[kk],
-                        Ks_train=Ks_train,
-                        tol=cg_tol[ii],
-                        random_state=random_state,
-                        hyper_gradient_method=hyper_gradient_method,
-                        previous_solution=previous_solutions[kk],
+                    max_iter_inner_dual_ = max_iter_inner_dual
+                    cg_tol_ = cg_tol[ii]
+                    inner_function_ = inner_function
+
+                def _update_dual_weights(kk):
+                    Ks_train = Ks_train_folds[kk]
+                    Y_train = Y_train_folds[kk]
+
+                    if kernel_ridge_method == "gradient_descent" and ii != 0:
+                        kwargs = dict(lipschitz_Ks=lipschitz_constants[kk])
+                    else:
+                        kwargs = dict()
+
+                    return inner_function_(
+                        Ks_train,
+                        Y_train,
+                        deltas_batch,
+                        initial_dual_weights=dual_weights_cv[kk],
+                        alpha=alpha,
+                        max_iter=max_iter_inner_dual_,
+                        tol=cg_tol_,
+                        **kwargs,
                     )
 
-                    gradients += gradients_kk * Y_val.shape[0] / n_samples
-
-                    scores[kk] = score_func(Y_val, predictions)
-
-                it = ii * max_iter_inner_hyper + jj
-                cv_scores[it, batch] = backend.to_cpu(scores.mean(0))
+                if (
+                    Y_train_stack is not None
+                    and inner_function_
+                    is solve_weighted_kernel_ridge_conjugate_gradient
+                ):
+                    # all splits have the same sizes, and are solved together
+                    # with a single conjugate gradient over stacked kernels
+                    dual_weights_cv = _update_dual_weights_stacked(
+                        Ks_train_stack,
+                        Y_train_stack,
+                        deltas_batch,
+                        dual_weights_cv,
+                        alpha=alpha,
+                        max_iter=max_iter_inner_dual_,
+                        tol=cg_tol_,
+                    )
+                else:
+                    # the splits are independent, and can be solved in parallel
+                    dual_weights_cv = parallel(
+                        delayed(_update_dual_weights)(kk) for kk in range(n_splits)
+                    )
 
-                # update deltas, using the minimum step size over splits
-                step_size = backend.min(backend.stack(step_sizes), axis=0)
-                deltas[:, batch] -= gradients * step_size[None, :]
-                assert not backend.any(backend.isinf(backend.exp(deltas[:, batch])))
+                ###################
+                # update the deltas
+
+                # chi = Ks @ dual_weights does not depend on deltas, so it is
+                # computed once for all inner iterations
+                chi_train_folds, chi_val_folds = _compute_chi_folds(
+                    Ks_train_val_folds,
+                    Ks_train_val_stack,
+                    dual_weights_cv,
+                    n_samples_train_folds,
+                    only_val=hyper_gradient_method == "direct",
+                    parallel=parallel,
+                )
 
-            ####################
-            # stopping criterion
-            if tol is not None:
-                if backend.max(backend.abs(deltas_old - deltas[:, batch])) < tol:
+                deltas_old = backend.copy(deltas_batch)
+                for jj in range(max_iter_inner_hyper):
+                    gradients = backend.zeros_like(deltas_batch)
+                    scores = backend.zeros_like(
+                        Ks_cv, shape=(n_splits, deltas_batch.shape[1])
+                    )
+                    if hyper_gradient_method == "direct":
+                        # the direct gradient does not use the training kernels
+                        results = parallel(
+                            delayed(_compute_delta_gradient_direct)(
+                                Ks_val=Ks_val_folds[kk],
+                                Y_val=Y_val_folds[kk],
+                                deltas=deltas_batch,
+                                exp_delta=exp_deltas,
+                                dual_weights=dual_weights_cv[kk],
+                                chi_val=chi_val_folds[kk],
+                                random_state=random_state,
+                            )
+                            for kk in range(n_splits)
+                        )
+                        results = [result + (None,) for result in results]
+                    else:
+                        results = parallel(
+                            delayed(_compute_delta_gradient_indirect)(
+                                Ks_val=Ks_val_folds[kk],
+                                Y_val=Y_val_folds[kk],
+                                deltas=deltas_batch,
+                                exp_delta=exp_deltas,
+                                dual_weights=dual_weights_cv[kk],
+                                Ks_train=Ks_train_folds[kk],
+                                chi_val=chi_val_folds[kk],
+                                chi_train=chi_train_folds[kk],
+                                tol=cg_tol[ii],
+                                random_state=random_state,
+                                hyper_gradient_method=hyper_gradient_method,
+                                previous_solution=previous_solutions[kk],
+                            )
+                            for kk in range(n_splits)
+                        )
+                    step_size = None
+                    for kk in range(n_splits):
+                        (
+                            gradients_kk,
+                            step_size_kk,
+                            predictions,
+                            previous_solutions[kk],
+                        ) = results[kk]
+                        Y_val = Y_val_folds[kk]
+
+                        gradients += gradients_kk * Y_val.shape[0] / n_samples
+
+                        # minimum step size over splits, reduced in place
+                        if step_size is None:
+                            step_size = step_size_kk
+                        else:
+                            backend.minimum(step_size, step_size_kk, out=step_size)
+
+                        scores[kk] = score_func(Y_val, predictions)
+
+                    it = ii * max_iter_inner_hyper + jj
+                    cv_scores[it, active] = backend.to_cpu(scores.mean(0))
+
+                    # update deltas, using the minimum step size over splits
+                    deltas_batch -= gradients * step_size[None, :]
+                    # exp(deltas) overflows iff deltas > log(max float). Check
+                    # it before the next step uses exp(deltas), with a single
+                    # reduction instead of an isinf check on exp(deltas).
+                    assert backend.max(deltas_batch) < max_deltas
+                    exp_deltas = backend.exp(deltas_batch)
+                deltas[:, backend.to_gpu(active, device=device)] = deltas_batch
+
+                ####################
+                # stopping criterion
+                if tol is not None:
+                    converged = (
+                        backend.max(backend.abs(deltas_old - deltas_batch), axis=0)
+                        < tol
+                    )
+                    converged_cpu = backend.to_numpy(converged)
                     if it + 1 < cv_scores.shape[0]:
-                        cv_scores[it + 1, batch] = cv_scores[it, batch]
-                    break
-
-        ##########################################
-        # refit dual weights on the entire dataset
-        if return_weights in ["primal", "dual"]:
-            dual_weights = solve_weighted_kernel_ridge_conjugate_gradient(
-                Ks,
-                Y_batch,
-                deltas[:, batch],
-                initial_dual_weights=None,
-                alpha=alpha,
-                max_iter=100,
-                tol=1e-4,
-            )
-            if return_weights == "primal":
-                # multiply by g and not np.sqrt(g), as we then want to use
-                # the primal weights on the unscaled features Xs, and not
-                # on the scaled features (np.sqrt(g) * Xs)
-                X = None
-                for tt in range(refit_weights[:, batch].shape[1]):
-                    X = backend.concatenate(
-                        [
-                            t * g
-                            for t, g in zip(Xs, backend.exp(deltas[:, batch][:, tt]))
-                        ],
-                        1,
+                        ids = active[converged_cpu]
+                        cv_scores[it + 1, ids] = cv_scores[it, ids]
+                    if converged_cpu.all():
+                        break
+
+                    # converged targets are not updated anymore, such that the
+                    # next iterations only work on the remaining targets
+                    if converged_cpu.any():
+                        keep = ~converged
+                        active = active[~converged_cpu]
+                        deltas_batch, exp_deltas, deltas_old = _select_targets(
+                            (deltas_batch, exp_deltas, deltas_old), keep
+                        )
+                        Y_train_folds = _select_targets(Y_train_folds, keep)
+                        Y_val_folds = _select_targets(Y_val_folds, keep)
+                        Y_train_stack = _select_targets(Y_train_stack, keep)
+                        dual_weights_cv = _select_targets(dual_weights_cv, keep)
+                        previous_solutions = _select_targets(previous_solutions, keep)
+
+            ##########################################
+            # refit dual weights on the entire dataset
+            if return_weights in ["primal", "dual"]:
+                exp_deltas = backend.exp(deltas[:, batch])
+                refit_method_ = refit_method
+                if refit_method == "auto":
+                    refit_method_ = _choose_refit_method(deltas[:, batch], n_samples)
+                if refit_method_ == "cholesky":
+                    dual_weights = solve_weighted_kernel_ridge_cholesky(
+                        Ks, Y_batch, deltas[:, batch], alpha=alpha
                     )
-                    refit_weights[:, batch][:, tt] = backend.to_cpu(
-                        backend.matmul(X.T, dual_weights[:, tt])
+                else:
+                    dual_weights = solve_weighted_kernel_ridge_conjugate_gradient(
+                        Ks,
+                        Y_batch,
+                        deltas[:, batch],
+                        alpha=alpha,
+                        max_iter=100,
+                        tol=1e-4,
                     )
-                del X
-
-            elif return_weights == "dual":
-                refit_weights[:, batch] = backend.to_cpu(dual_weights)
-
-            del dual_weights
+                if return_weights == "primal":
+                    # multiply by g and not np.sqrt(g), as we then want to use
+                    # the primal weights on the unscaled features Xs, and not
+                    # on the scaled features (np.sqrt(g) * Xs)
+                    X = None
+                    for tt in range(refit_weights[:, batch].shape[1]):
+                        X = backend.concatenate(
+                            [
+                                t * g
+                                for t, g in zip(Xs, exp_deltas[:, tt])
+                            ],
+                            1,
+                        )
+                        refit_weights[:, batch][:, tt] = backend.to_cpu(
+                            backend.matmul(X.T, dual_weights[:, tt])
+                        )
+                    del X
+
+                elif return_weights == "dual":
+                    refit_weights[:, batch] = backend.to_cpu(dual_weights)
+
+                del dual_weights
 
     if progress_bar:
         bar.update(bar.max_value)
         bar.close()
 
+    if mixed:
+        deltas = backend.asarray(deltas, dtype=dtype)
+
     results = [deltas, refit_weights, cv_scores]
     if fit_intercept:
         pass  # results.append(intercept)
@@ -331,6 +555,35 @@ MULTIPLE_KERNEL_RIDGE_SOLVERS = {
 }
 
 
+def _choose_refit_method(deltas, n_samples):
+    """Choose the refit method for refit_method="auto".
+
+    Cholesky factorizations are only faster than the conjugate gradient if
+    each factorization is shared by many targets with identical deltas.
+
+    Parameters
+    ----------
+    deltas : array of shape (n_kernels, n_targets)
+        Log of the kernel weights.
+    n_samples : int
+        Number of samples.
+
+    Returns
+    -------
+    refit_method : str, "cholesky" or "conjugate_gradient"
+        Refit method.
+    """
+    backend = get_backend()
+    if n_samples > _MAX_N_SAMPLES_CHOLESKY:
+        return "conjugate_gradient"
+
+    n_targets = deltas.shape[1]
+    n_unique = np.unique(backend.to_numpy(deltas), axis=1).shape[1]
+    if n_unique * _MIN_TARGETS_PER_CHOLESKY <= n_targets:
+        return "cholesky"
+    return "conjugate_gradient"
+
+
 def _init_multiple_kernel_ridge(Ks, Y, initial_deltas, cv, **ridgecv_kwargs):
     """Initialize deltas, i.e. log kernel weights.
 
@@ -390,6 +643,191 @@ def _init_multiple_kernel_ridge(Ks, Y, initial_deltas, cv, **ridgecv_kwargs):
     return deltas
 
 
+class _SplitKernels:
+    """Kernels of each cross-validation split, gathered on each access.
+
+    Behaves like a list of arrays of shape (n_kernels, n_rows, n_columns),
+    without keeping the gathered kernels in memory.
+
+    Parameters
+    ----------
+    Ks : array of shape (n_kernels, n_samples, n_samples)
+        Kernels on the entire dataset.
+    rows_folds : list of arrays of int
+        Row indices of each split.
+    columns_folds : list of arrays of int
+        Column indices of each split.
+    """
+
+    def __init__(self, Ks, rows_folds, columns_folds):
+        self.Ks = Ks
+        self.rows_folds = rows_folds
+        self.columns_folds = columns_folds
+
+    def __len__(self):
+        return len(self.rows_folds)
+
+    def __getitem__(self, kk):
+        return self.Ks[:, self.rows_folds[kk][:, None], self.columns_folds[kk]]
+
+    def __iter__(self):
+        return (self[kk] for kk in range(len(self)))
+
+
+def _compute_chi_folds(
+    Ks_train_val_folds,
+    Ks_train_val_stack,
+    dual_weights_cv,
+    n_samples_train_folds,
+    only_val=False,
+    parallel=None,
+):
+    """Compute chi = Ks @ dual_weights on the training and validation sets.
+
+    Parameters
+    ----------
+    Ks_train_val_folds : list of arrays of shape \
+            (n_kernels, n_samples_train + n_samples_val, n_samples_train)
+        Training kernels and validation cross-kernels of each split.
+    Ks_train_val_stack : array of shape \
+            (n_splits, n_kernels, n_samples, n_samples_train), or None
+        Stacked Ks_train_val_folds, if all splits have the same sizes. If not
+        None, chi is computed on all splits with a single batched matmul.
+    dual_weights_cv : list of arrays of shape (n_samples_train, n_targets)
+        Kernel ridge weights of each split.
+    n_samples_train_folds : list of int
+        Number of training samples in each split.
+    only_val : bool
+        If True, only compute chi on the validation sets.
+    parallel : joblib.Parallel or None
+        Used to compute the splits in parallel, if they are not stacked.
+
+    Returns
+    -------
+    chi_train_folds : list of arrays of shape \
+            (n_kernels, n_samples_train, n_targets), or list of None
+        Ks_train @ dual_weights for each split. None if only_val is True.
+    chi_val_folds : list of arrays of shape \
+            (n_kernels, n_samples_val, n_targets)
+        Ks_val @ dual_weights for each split.
+    """
+    backend = get_backend()
+    n_splits = len(Ks_train_val_folds)
+
+    if Ks_train_val_stack is not None:
+        dual_weights_stack = backend.stack(dual_weights_cv)[:, None]
+        if only_val:
+            n_samples_train = n_samples_train_folds[0]
+            chi_folds = backend.matmul(
+                Ks_train_val_stack[:, :, n_samples_train:], dual_weights_stack
+            )
+            return [None] * n_splits, list(chi_folds)
+        chi_folds = backend.matmul(Ks_train_val_stack, dual_weights_stack)
+    else:
+        if parallel is None:
+            parallel = Parallel(n_jobs=1)
+        if only_val:
+            chi_folds = parallel(
+                delayed(backend.matmul)(Ks_train_val[:, n_samples_train:], dual_weights)
+                for Ks_train_val, dual_weights, n_samples_train in zip(
+                    Ks_train_val_folds, dual_weights_cv, n_samples_train_folds
+                )
+            )
+            return [None] * n_splits, list(chi_folds)
+        chi_folds = parallel(
+            delayed(backend.matmul)(Ks_train_val, dual_weights)
+            for Ks_train_val, dual_weights in zip(Ks_train_val_folds, dual_weights_cv)
+        )
+
+    chi_train_folds = [
+        chi[:, :n_samples_train]
+        for chi, n_samples_train in zip(chi_folds, n_samples_train_folds)
+    ]
+    chi_val_folds = [
+        chi[:, n_samples_train:]
+        for chi, n_samples_train in zip(chi_folds, n_samples_train_folds)
+    ]
+    return chi_train_folds, chi_val_folds
+
+
+def _update_dual_weights_stacked(
+    Ks_train_stack,
+    Y_train_stack,
+    deltas,
+    dual_weights_cv,
+    alpha=1.0,
+    max_iter=100,
+    tol=1e-3,
+):
+    """Update the dual weights of all splits with a single conjugate gradient.
+
+    Parameters
+    ----------
+    Ks_train_stack : array of shape \
+            (n_splits, n_kernels, n_samples_train, n_samples_train)
+        Kernels on the training set of each split.
+    Y_train_stack : array of shape (n_splits, n_samples_train, n_targets)
+        Target data on the training set of each split.
+    deltas : array of shape (n_kernels, n_targets)
+        Log of the kernel weights.
+    dual_weights_cv : list of arrays of shape (n_samples_train, n_targets), \
+            or list of None
+        Kernel ridge weights of the previous solve, for each split, used as
+        warm start. If None, the solve starts from zero.
+    alpha : float
+        Regularization parameter.
+    max_iter : int
+        Maximum number of conjugate gradient step.
+    tol : float > 0 or None
+        Tolerance for the stopping criterion.
+
+    Returns
+    -------
+    dual_weights_cv : list of arrays of shape (n_samples_train, n_targets)
+        Updated kernel ridge weights, for each split.
+    """
+    backend = get_backend()
+    n_splits = len(dual_weights_cv)
+
+    if dual_weights_cv[0] is None:
+        initial_dual_weights = None
+    else:
+        initial_dual_weights = backend.stack(dual_weights_cv)
+
+    dual_weights = _solve_weighted_kernel_ridge_conjugate_gradient_splits(
+        Ks_train_stack,
+        Y_train_stack,
+        deltas,
+        initial_dual_weights=initial_dual_weights,
+        alpha=alpha,
+        max_iter=max_iter,
+        tol=tol,
+    )
+    return [dual_weights[kk] for kk in range(n_splits)]
+
+
+def _select_targets(arrays, mask):
+    """Select targets on the last axis of arrays.
+
+    Parameters
+    ----------
+    arrays : array, None, or list or tuple of (arrays, None, or tuples)
+        Arrays with targets on the last axis.
+    mask : array of shape (n_targets, ) of bool
+        Targets to select.
+
+    Returns
+    -------
+    arrays : array, None, or list or tuple of (arrays, None, or tuples)
+        Selected arrays, with the same structure as the input.
+    """
+    if arrays is None:
+        return None
+    if isinstance(arrays, (list, tuple)):
+        return type(arrays)(_select_targets(array, mask) for array in arrays)
+    return arrays[..., mask]
+
+
 def _compute_delta_loss(Ks_val, Y_val, deltas, dual_weights):
     """Compute the validation loss.
 
@@ -412,25 +850,96 @@ def _compute_delta_loss(Ks_val, Y_val, deltas, dual_weights):
     backend = get_backend()
     exp_delta = backend.exp(deltas)
     chi_val = backend.matmul(Ks_val, dual_weights)
-    exp_delta_chi_val = exp_delta[:, None, :] * chi_val
-    predictions = exp_delta_chi_val.sum(0)
+    predictions = backend.einsum("kst,kt->st", chi_val, exp_delta)
     residuals = predictions - Y_val
     loss = 0.5 * backend.norm(residuals, axis=0) ** 2
     return loss
 
 
-def _compute_delta_gradient(
+def _compute_delta_gradient_direct(
+    Ks_val,
+    Y_val,
+    deltas,
+    dual_weights,
+    random_state=None,
+    chi_val=None,
+    exp_delta=None,
+):
+    """Compute the direct gradient over deltas on the validation dataset.
+
+    The direct gradient ignores the dependence of the dual weights on deltas,
+    hence it does not need the training kernels.
+
+    Parameters
+    ----------
+    Ks_val : array of shape (n_kernels, n_samples_val, n_samples_train)
+        Cross-kernels between training set and validation set.
+    Y_val : array of shape (n_samples_val, n_targets)
+        Target data on the validation set.
+    deltas : array of shape (n_kernels, n_targets)
+        Log of the kernel weights.
+    dual_weights : array of shape (n_samples_train, n_targets)
+        Kernel ridge weights.
+    random_state : int, or None
+        Random generator seed. Use an int for deterministic search.
+    chi_val : array of shape (n_kernels, n_samples_val, n_targets) or None
+        Precomputed Ks_val @ dual_weights. If None, it is computed here.
+    exp_delta : array of shape (n_kernels, n_targets) or None
+        Precomputed exp(deltas). If None, it is computed here.
+
+    Returns
+    -------
+    gradient : array of shape (n_kernels, n_targets)
+        Direct gradient over deltas.
+    step_size : array of shape (n_targets)
+        Step size computed based on the direct gradient's Lipschitz constant.
+    predictions : array of shape (n_samples_val, n_targets)
+        Predictions on the validation set.
+    """
+    backend = get_backend()
+
+    # prepare quantities
+    # (exp(delta) * chi is never materialized, the exponential scaling is
+    # applied on the reduced arrays instead)
+    if exp_delta is None:
+        exp_delta = backend.exp(deltas)
+    if chi_val is None:
+        chi_val = backend.matmul(Ks_val, dual_weights)
+    predictions = backend.einsum("kst,kt->st", chi_val, exp_delta)
+    assert predictions.shape == Y_val.shape
+
+    # direct gradient
+    residuals = predictions - Y_val
+    direct_gradient = backend.einsum("kst,st->kt", chi_val, residuals) * exp_delta
+    assert direct_gradient.shape == deltas.shape
+
+    # estimate a step size
+    XTXs = _compute_deltas_hessian(chi_val, exp_delta, direct_gradient)
+    # (these lipschitz constants only correspond to the direct gradient)
+    lipschitz_1 = compute_lipschitz_constants(XTXs, "X", random_state=random_state)
+    step_size = 1.0 / (lipschitz_1 + 1e-15)
+
+    return direct_gradient, step_size, predictions
+
+
+def _compute_delta_gradient_indirect(
     Ks_val,
     Y_val,
     deltas,
     dual_weights,
-    Ks_train=None,
+    Ks_train,
     tol=None,
     previous_solution=None,
     hyper_gradient_method="conjugate_gradient",
     random_state=None,
+    chi_val=None,
+    chi_train=None,
+    exp_delta=None,
 ):
-    """Compute the gradient over deltas on the validation dataset.
+    """Compute the direct and indirect gradient over deltas.
+
+    The indirect gradient accounts for the dependence of the dual weights on
+    deltas, by inverting the Hessian of the inner problem on the training set.
 
     Parameters
     ----------
@@ -444,17 +953,22 @@ def _compute_delta_gradient(
         Kernel ridge weights.
     Ks_train : array of shape (n_kernels, n_samples_train, n_samples_train)
         Kernels on the training set.
-        Not required if hyper_gradient_method = "direct".
     tol : float
         Tolerance for the conjugate method.
         Required if hyper_gradient_method = "conjugate_gradient".
     previous_solution
         Speed up hyper_gradient_method = "conjugate_gradient" by warm starting
         with the previous solution.
-    hyper_gradient_method : str, in {"conjugate_gradient", "neumann", "direct"}
-        Method used to compute the hyper gradient.
+    hyper_gradient_method : str, in {"conjugate_gradient", "neumann"}
+        Method used to invert the Hessian.
     random_state : int, or None
         Random generator seed. Use an int for deterministic search.
+    chi_val : array of shape (n_kernels, n_samples_val, n_targets) or None
+        Precomputed Ks_val @ dual_weights. If None, it is computed here.
+    chi_train : array of shape (n_kernels, n_samples_train, n_targets) or None
+        Precomputed Ks_train @ dual_weights. If None, it is computed here.
+    exp_delta : array of shape (n_kernels, n_targets) or None
+        Precomputed exp(deltas). If None, it is computed here.
 
     Returns
     -------
@@ -464,85 +978,72 @@ def _compute_delta_gradient(
         Step size computed based on the direct gradient's Lipschitz constant.
     predictions : array of shape (n_samples_val, n_targets)
         Predictions on the validation set.
-    solution : array of shape (n_samples_train, n_targets) or None
+    solution : array of shape (n_samples_train, n_targets)
         Solution of the inverse Hessian in the indirect gradient.
     """
     backend = get_backend()
 
-    # prepare quantities
-    exp_delta = backend.exp(deltas)
-    chi_val = backend.matmul(Ks_val, dual_weights)
-    exp_delta_chi_val = exp_delta[:, None, :] * chi_val
-    predictions = exp_delta_chi_val.sum(0)
-    assert predictions.shape == Y_val.shape
-
-    # direct gradient
+    if exp_delta is None:
+        exp_delta = backend.exp(deltas)
+    direct_gradient, step_size, predictions = _compute_delta_gradient_direct(
+        Ks_val,
+        Y_val,
+        deltas,
+        dual_weights,
+        random_state=random_state,
+        chi_val=chi_val,
+        exp_delta=exp_delta,
+    )
     residuals = predictions - Y_val
-    direct_gradient = (residuals[None] * exp_delta_chi_val).sum(1)
-    assert direct_gradient.shape == deltas.shape
 
-    # estimate a step size
-    XTXs = _compute_deltas_hessian(exp_delta_chi_val, residuals)
-    # (these lipschitz constants only correspond to the direct gradient)
-    lipschitz_1 = compute_lipschitz_constants(XTXs, "X", random_state=random_state)
-    step_size = 1.0 / (lipschitz_1 + 1e-15)
-
-    if hyper_gradient_method == "direct":
-        gradient = direct_gradient
-        solution = None
+    # compute nabla_g_1
+    tmp = backend.matmul(backend.transpose(Ks_val, (2, 0, 1)), residuals)
+    tmp = backend.transpose(tmp, (2, 0, 1))
+    nabla_g_1 = backend.matmul(tmp, backend.transpose(exp_delta, (1, 0))[:, :, None])
+    nabla_g_1 = backend.transpose(nabla_g_1[:, :, 0], (1, 0))
+    assert nabla_g_1.shape == dual_weights.shape
+
+    # solve linear system (sum_i gamma[i]*K[i] + 1) @ X = nabla_g_1
+    alpha = 1
+    assert Ks_train is not None
+    if hyper_gradient_method == "conjugate_gradient":
+        assert tol is not None
+        solution = solve_weighted_kernel_ridge_conjugate_gradient(
+            Ks=Ks_train,
+            Y=nabla_g_1,
+            deltas=deltas,
+            initial_dual_weights=previous_solution,
+            max_iter=100,
+            tol=tol,
+            alpha=alpha,
+        )
+    elif hyper_gradient_method == "neumann":
+        solution = solve_weighted_kernel_ridge_neumann_series(
+            Ks=Ks_train,
+            Y=nabla_g_1,
+            deltas=deltas,
+            max_iter=5,
+            factor=0.00001,
+            alpha=alpha,
+        )
     else:
-        # compute the indirect gradient by inverting the Hessian
-
-        # compute nabla_g_1
-        tmp = backend.matmul(backend.transpose(Ks_val, (2, 0, 1)), residuals)
-        tmp = backend.transpose(tmp, (2, 0, 1))
-        nabla_g_1 = backend.matmul(
-            tmp, backend.transpose(exp_delta, (1, 0))[:, :, None]
+        raise ValueError(
+            "Unknown parameter hyper_gradient_method=%r." % (hyper_gradient_method,)
         )
-        nabla_g_1 = backend.transpose(nabla_g_1[:, :, 0], (1, 0))
-        assert nabla_g_1.shape == dual_weights.shape
-
-        # solve linear system (sum_i gamma[i]*K[i] + 1) @ X = nabla_g_1
-        alpha = 1
-        assert Ks_train is not None
-        if hyper_gradient_method == "conjugate_gradient":
-            assert tol is not None
-            solution = solve_weighted_kernel_ridge_conjugate_gradient(
-                Ks=Ks_train,
-                Y=nabla_g_1,
-                deltas=deltas,
-                initial_dual_weights=previous_solution,
-                max_iter=100,
-                tol=tol,
-                alpha=alpha,
-            )
-        elif hyper_gradient_method == "neumann":
-            solution = solve_weighted_kernel_ridge_neumann_series(
-                Ks=Ks_train,
-                Y=nabla_g_1,
-                deltas=deltas,
-                max_iter=5,
-                factor=0.00001,
-                alpha=alpha,
-            )
-        else:
-            raise ValueError(
-                "Unknown parameter hyper_gradient_method=%r." % (hyper_gradient_method,)
-            )
 
-        # finish the indirect gradient
+    # finish the indirect gradient
+    if chi_train is None:
         chi_train = backend.matmul(Ks_train, dual_weights)
-        exp_delta_chi_train = exp_delta[:, None, :] * chi_train
-        indirect_gradient = (exp_delta_chi_train * solution[None, :, :]).sum(1)
-        assert indirect_gradient.shape == deltas.shape
+    indirect_gradient = backend.einsum("kst,st->kt", chi_train, solution) * exp_delta
+    assert indirect_gradient.shape == deltas.shape
 
-        gradient = direct_gradient - indirect_gradient
-        assert not backend.any(backend.isinf(gradient))
+    gradient = direct_gradient - indirect_gradient
+    assert not backend.any(backend.isinf(gradient))
 
     return gradient, step_size, predictions, solution
 
 
-def _compute_deltas_hessian(exp_delta_chi, residuals):
+def _compute_deltas_hessian(chi, exp_delta, direct_gradient):
     """Compute the hessian of the direct gradient.
 
     The direct gradient corresponds to a linear problem:
@@ -550,14 +1051,16 @@ def _compute_deltas_hessian(exp_delta_chi, residuals):
     where chi = Ks @ dual_weights.
 
     The Hessian is not just `chi.T @ chi` because of the exponential
-    parametrization of deltas.
+    parametrization of deltas, which adds the direct gradient on the diagonal.
 
     Parameters
     ----------
-    exp_delta_chi : array of shape (n_kernels, n_samples, n_targets)
-        Precomputation of exp(delta) * (Ks @ dual_weights).
-    residuals : array of shape (n_samples, n_targets)
-        Difference between prediction and target on the validation split.
+    chi : array of shape (n_kernels, n_samples, n_targets)
+        Precomputation of Ks @ dual_weights.
+    exp_delta : array of shape (n_kernels, n_targets)
+        Kernel weights.
+    direct_gradient : array of shape (n_kernels, n_targets)
+        Direct gradient, equal to (exp(delta) * chi).T @ residuals.
 
     Returns
     -------
@@ -566,14 +1069,12 @@ def _compute_deltas_hessian(exp_delta_chi, residuals):
     """
     backend = get_backend()
 
+    # a single batched matmul over targets, (t, k, s) @ (t, s, l) -> (t, k, l)
     XTXs = backend.matmul(
-        backend.transpose(exp_delta_chi, (2, 0, 1)),
-        backend.transpose(exp_delta_chi, (2, 1, 0)),
+        backend.transpose(chi, (2, 0, 1)), backend.transpose(chi, (2, 1, 0))
     )
-    XTbs = backend.matmul(
-        backend.transpose(exp_delta_chi, (2, 0, 1)),
-        backend.transpose(residuals, (1, 0))[:, :, None],
-    )[:, :, 0]
+    exp_delta_T = backend.transpose(exp_delta, (1, 0))
+    XTXs *= exp_delta_T[:, :, None] * exp_delta_T[:, None, :]
     diagonal_view = backend.diagonal_view(XTXs, axis1=1, axis2=2)
-    diagonal_view += XTbs
+    diagonal_view += backend.transpose(direct_gradient, (1, 0))
     return XTXs
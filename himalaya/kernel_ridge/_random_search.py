@@ -153,10 +153,14 @@ def solve_multiple_kernel_ridge_random_search(
     cv = check_cv(cv, Y)
     n_splits = cv.get_n_splits()
     n_kernels = len(Ks)
-    for train, val in cv.split(Y):
+    splits = list(cv.split(Y))
+    for train, val in splits:
         if len(val) == 0 or len(train) == 0:
             raise ValueError("Empty train or validation set. "
                              "Check that `cv` is correctly defined.")
+    # the splits do not depend on the candidates, move them to device once
+    splits = [(backend.to_gpu(train, device=device),
+               backend.to_gpu(test, device=device)) for train, test in splits]
 
     if jitter_alphas:
         random_generator = check_random_state(random_state)
@@ -204,11 +208,13 @@ def solve_multiple_kernel_ridge_random_search(
             bar(gammas, '%d random sampling with cv' % len(gammas),
                 use_it=progress_bar)):
 
+        # weighted sum of kernels, computed as a single matrix-vector product
+        # to avoid a temporary array of shape (n_kernels, n_samples, n_samples)
         if Ks_in_cpu:
-            K = (backend.to_cpu(gamma[:, None, None]) * Ks).sum(0)
-            K = backend.to_gpu(K, device=device)
+            K = backend.to_cpu(gamma) @ Ks.reshape(n_kernels, -1)
+            K = backend.to_gpu(K.reshape(Ks.shape[1:]), device=device)
         else:
-            K = (gamma[:, None, None] * Ks).sum(0)
+            K = (gamma @ Ks.reshape(n_kernels, -1)).reshape(Ks.shape[1:])
 
         if jitter_alphas:
             noise = backend.asarray_like(random_generator.rand(), alphas)
@@ -216,9 +222,7 @@ def solve_multiple_kernel_ridge_random_search(
 
         scores = backend.zeros_like(gammas,
                                     shape=(n_splits, len(alphas), n_targets))
-        for jj, (train, test) in enumerate(cv.split(K)):
-            train = backend.to_gpu(train, device=device)
-            test = backend.to_gpu(test, device=device)
+        for jj, (train, test) in enumerate(splits):
             Ktrain, Ktest = K[train[:, None], train], K[test[:, None], train]
             if fit_intercept:
                 centerer = KernelCenterer()
@@ -257,7 +261,6 @@ def solve_multiple_kernel_ridge_random_search(
                 scores[jj, alpha_batch, :][too_small_alphas] = -1e5
 
                 del matrix, predictions
-            del train, test
 
         # select best alphas
         alphas_argmax, cv_scores_ii = _select_best_alphas(
@@ -1018,8 +1018,8 @@ class WeightedKernelRidge(_BaseWeightedKernelRidge):
         docstring of the function: ``WeightedKernelRidge.ALL_KERNELS[kernel]``
 
     solver : str
-        Algorithm used during the fit, "conjugate_gradient", or
-        "gradient_descent".
+        Algorithm used during the fit, "conjugate_gradient",
+        "gradient_descent", "neumann_series", or "cholesky".
 
     solver_params : dict or None
         Additional parameters for the solver. See more details in the docstring
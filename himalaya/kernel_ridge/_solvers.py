@@ -1,5 +1,7 @@
 import numbers
 
+import numpy as np
+
 from ..backend import get_backend
 from ..utils import compute_lipschitz_constants
 from ..utils import _batch_or_skip
@@ -423,6 +425,119 @@ def solve_weighted_kernel_ridge_conjugate_gradient(Ks, Y, deltas, alpha=1.,
         return dual_weights
 
 
+def _solve_weighted_kernel_ridge_conjugate_gradient_splits(
+        Ks, Y, deltas, alpha=1., initial_dual_weights=None, max_iter=100,
+        tol=1e-4):
+    """Solve several weighted kernel ridge regressions with shared deltas.
+
+    Same as solve_weighted_kernel_ridge_conjugate_gradient, but solves
+    independent problems (e.g. the cross-validation splits) at once, with
+    batched matmuls over a leading axis. Each problem stops being updated on
+    a target once it has converged, such that the result matches independent
+    solves. A target is removed once it has converged on all problems.
+
+    Parameters
+    ----------
+    Ks : array of shape (n_splits, n_kernels, n_samples, n_samples)
+        Input kernels of each problem.
+    Y : array of shape (n_splits, n_samples, n_targets)
+        Target data of each problem.
+    deltas : array of shape (n_kernels, n_targets)
+        Kernel weights, shared by all problems.
+    alpha : float
+        Regularization parameter.
+    initial_dual_weights : array of shape (n_splits, n_samples, n_targets)
+        Initial kernel ridge coefficients.
+    max_iter : int
+        Maximum number of conjugate gradient step.
+    tol : float > 0 or None
+        Tolerance for the stopping criterion.
+
+    Returns
+    -------
+    dual_weights : array of shape (n_splits, n_samples, n_targets)
+        Kernel ridge coefficients.
+    """
+    backend = get_backend()
+    n_splits, _, n_targets = Y.shape
+
+    if Ks.shape[2] != Y.shape[1]:
+        raise ValueError("Ks and Y must have the same number of samples.")
+    if Ks.shape[2] != Ks.shape[3]:
+        raise ValueError("Kernels must be square.")
+
+    Ks, Y, deltas, initial_dual_weights = backend.check_arrays(
+        Ks, Y, deltas, initial_dual_weights)
+    exp_deltas = backend.exp(deltas)
+
+    if initial_dual_weights is None:
+        dual_weights = backend.zeros_like(Y)
+    else:
+        dual_weights = backend.copy(initial_dual_weights)
+
+    # compute initial residual
+    Ks_x_w = backend.matmul(Ks, dual_weights[:, None])
+    r = Y - backend.einsum("fkst,kt->fst", Ks_x_w, exp_deltas)
+    r -= alpha * dual_weights
+    del Ks_x_w
+    p = backend.copy(r)
+    new_squared_residual_norm = backend.sum(r ** 2, axis=1)
+
+    #########################
+    # Conjugate gradient loop
+    # converged problems are frozen, and removed once all problems converged
+    converged = backend.zeros_like(Y, dtype=backend.bool,
+                                   shape=(n_splits, n_targets))
+    removed = backend.zeros_like(Y, dtype=backend.bool, shape=(n_targets))
+    for i in range(max_iter):
+        frozen = converged[:, ~removed]
+        Ks_x_p = backend.matmul(Ks, p[:, None])
+        K_x_p_plus_reg = backend.einsum("fkst,kt->fst", Ks_x_p, exp_deltas)
+        K_x_p_plus_reg += alpha * p
+        del Ks_x_p
+
+        squared_residual_norm = new_squared_residual_norm
+        squared_p_A_norm = backend.sum(p * K_x_p_plus_reg, axis=1)
+
+        squared_p_A_norm[squared_p_A_norm == 0] = 1
+        alpha_step = squared_residual_norm / squared_p_A_norm
+        alpha_step[frozen] = 0
+
+        update = alpha_step[:, None] * p
+        dual_weights[:, :, ~removed] += update
+
+        r -= alpha_step[:, None] * K_x_p_plus_reg
+
+        new_squared_residual_norm = backend.sum(r ** 2, axis=1)
+
+        # a problem can be solved exactly before the others
+        squared_residual_norm[squared_residual_norm == 0] = 1
+        beta = (new_squared_residual_norm) / (squared_residual_norm)
+        beta[frozen] = 0
+        p = r + beta[:, None] * p
+
+        ##########################
+        # remove converged targets
+        if tol is not None:
+            relative_update = backend.abs(update /
+                                          dual_weights[:, :, ~removed])
+            relative_update[dual_weights[:, :, ~removed] == 0] = 0
+            just_converged = backend.max(relative_update, 1) < tol
+            converged[:, ~removed] = frozen | just_converged
+            just_removed = backend.all(converged[:, ~removed], 0)
+
+            r = r[:, :, ~just_removed]
+            p = p[:, :, ~just_removed]
+            new_squared_residual_norm = \
+                new_squared_residual_norm[:, ~just_removed]
+            exp_deltas = exp_deltas[:, ~just_removed]
+            removed[~removed] = just_removed
+            if backend.all(removed):
+                break
+
+    return dual_weights
+
+
 def solve_weighted_kernel_ridge_neumann_series(Ks, Y, deltas, alpha=1.,
                                                fit_intercept=False,
                                                max_iter=10, factor=0.0001,
@@ -543,14 +658,25 @@ def solve_weighted_kernel_ridge_neumann_series(Ks, Y, deltas, alpha=1.,
         Ks, Y, Ks_rows, Y_offset = _helper_intercept(Ks, Y)
 
     # product accumulator: product = (id_minus_K ** ii) @ Ys
-    product = Y
+    product = backend.copy(Y)
     # sum accumulator: dual_weights = sum_ii product
     dual_weights = backend.zeros_like(Y)
+    # buffers reused over iterations, to avoid allocating temporaries
+    K_x_product = backend.zeros_like(Y)
+    Ki_x_product = backend.zeros_like(Y)
+    decay = 1 - factor * alpha
     for ii in range(max_iter):
-        product = (
-            product * (1 - factor[None, :] * alpha[None, :]) -
-            factor[None, :] * backend.sum(
-                exp_deltas[:, None, :] * backend.matmul(Ks, product), axis=0))
+        # K_x_product = sum_i exp(deltas[i]) Ks[i] @ product
+        K_x_product[:] = 0
+        for kk in range(Ks.shape[0]):
+            backend.matmul(Ks[kk], product, out=Ki_x_product)
+            Ki_x_product *= exp_deltas[kk]
+            K_x_product += Ki_x_product
+
+        # product = product * (1 - factor * alpha) - factor * K_x_product
+        product *= decay
+        K_x_product *= factor
+        product -= K_x_product
         dual_weights += product
 
     dual_weights *= factor[None, :]
@@ -567,6 +693,108 @@ def solve_weighted_kernel_ridge_neumann_series(Ks, Y, deltas, alpha=1.,
         return dual_weights
 
 
+def solve_weighted_kernel_ridge_cholesky(Ks, Y, deltas, alpha=1.,
+                                         fit_intercept=False,
+                                         initial_dual_weights=None,
+                                         max_iter=None, tol=None,
+                                         n_targets_batch=None,
+                                         random_state=None):
+    """Solve weighted kernel ridge regression using Cholesky factorizations.
+
+    Solve the kernel ridge regression::
+
+        w* = argmin_w ||K @ w - Y||^2 + alpha (w.T @ K @ w)
+
+    where the kernel K is a weighted sum of multiple kernels::
+
+        K = sum_i exp(deltas[i]) Ks[i]
+
+    The targets are grouped by identical deltas and alpha, and the kernel of
+    each group is factorized only once. This direct solver is faster than the
+    iterative solvers when n_samples is moderate, or when many targets share
+    the same deltas.
+
+    Parameters
+    ----------
+    Ks : array of shape (n_kernels, n_samples, n_samples)
+        Input kernels.
+    Y : array of shape (n_samples, n_targets)
+        Target data.
+    deltas : array of shape (n_kernels, ) or (n_kernels, n_targets)
+        Kernel weights.
+    alpha : float, or array of shape (n_targets, )
+        Regularization parameter.
+    fit_intercept : boolean
+        Whether to fit an intercept. If False, Ks should be centered
+        (see KernelCenterer), and Y must be zero-mean over samples.
+    initial_dual_weights : array of shape (n_samples, n_targets)
+        Initial kernel ridge coefficients. Not used.
+    max_iter : int
+        Maximum number of iterations. Not used.
+    tol : float > 0 or None
+        Tolerance for the stopping criterion. Not used.
+    n_targets_batch : int or None
+        Size of the batch for over targets. Not used.
+    random_state : int, or None
+        Random generator seed. Not used.
+
+    Returns
+    -------
+    dual_weights : array of shape (n_samples, n_targets)
+        Kernel ridge coefficients.
+    intercept : array of shape (n_targets,)
+        Intercept. Only returned when fit_intercept is True.
+    """
+    backend = get_backend()
+    n_targets = Y.shape[1]
+
+    if deltas.ndim == 1:
+        deltas = deltas[:, None]
+    if isinstance(alpha, numbers.Number) or alpha.ndim == 0:
+        alpha = backend.ones_like(Y, shape=(1, )) * alpha
+
+    if Ks.shape[1] != Y.shape[0]:
+        raise ValueError("Ks and Y must have the same number of samples.")
+    if Ks.shape[1] != Ks.shape[2]:
+        raise ValueError("Kernels must be square.")
+
+    Ks, Y, deltas, alpha = backend.check_arrays(Ks, Y, deltas, alpha)
+    exp_deltas = backend.exp(deltas)
+
+    if fit_intercept:
+        Ks, Y, Ks_rows, Y_offset = _helper_intercept(Ks, Y)
+
+    # group the targets with identical hyperparameters
+    hyperparameters = np.concatenate([
+        np.broadcast_to(backend.to_numpy(deltas),
+                        (deltas.shape[0], n_targets)),
+        np.broadcast_to(backend.to_numpy(alpha)[None], (1, n_targets)),
+    ])
+    _, groups = np.unique(hyperparameters, axis=1, return_inverse=True)
+    groups = groups.reshape(-1)
+
+    dual_weights = backend.zeros_like(Y)
+    for gg in range(groups.max() + 1):
+        targets = np.flatnonzero(groups == gg)
+        tt = targets[0]
+        exp_delta = exp_deltas[:, tt if exp_deltas.shape[1] > 1 else 0]
+
+        K = backend.einsum("kij,k->ij", Ks, exp_delta)
+        backend.diagonal_view(K)[:] += alpha[tt if alpha.shape[0] > 1 else 0]
+        L = backend.cholesky(K)
+        del K
+
+        targets = backend.to_gpu(targets, device=getattr(Y, "device", None))
+        dual_weights[:, targets] = backend.cho_solve(L, Y[:, targets])
+
+    if fit_intercept:
+        intercept = Y_offset
+        intercept -= ((Ks_rows @ dual_weights) * backend.exp(deltas)).sum(0)
+        return dual_weights, intercept
+    else:
+        return dual_weights
+
+
 def _helper_intercept(Ks, Y):
     """Transform Ks and Y if we fit an intercept."""
     backend = get_backend()
@@ -590,6 +818,7 @@ WEIGHTED_KERNEL_RIDGE_SOLVERS = {
     "neumann_series": solve_weighted_kernel_ridge_neumann_series,
     "conjugate_gradient": solve_weighted_kernel_ridge_conjugate_gradient,
     "gradient_descent": solve_weighted_kernel_ridge_gradient_descent,
+    "cholesky": solve_weighted_kernel_ridge_cholesky,
 }
 ###############################################################################
 
@@ -10,7 +10,8 @@ from himalaya.backend import ALL_BACKENDS
 from himalaya.scoring import r2_score
 from himalaya.utils import assert_array_almost_equal
 
-from himalaya.kernel_ridge._hyper_gradient import _compute_delta_gradient
+from himalaya.kernel_ridge._hyper_gradient import _compute_delta_gradient_direct
+from himalaya.kernel_ridge._hyper_gradient import _compute_delta_gradient_indirect
 from himalaya.kernel_ridge._hyper_gradient import _compute_delta_loss
 from himalaya.kernel_ridge import solve_multiple_kernel_ridge_hyper_gradient
 from himalaya.kernel_ridge import solve_multiple_kernel_ridge_random_search
@@ -72,9 +73,7 @@ def test_delta_gradient_direct(backend, n_targets_batch):
     deltas2 = deltas + epsilons * step
 
     # check direct gradient with a finite difference
-    gradients = _compute_delta_gradient(
-        Ks, Y, deltas, dual_weights, hyper_gradient_method="direct"
-    )[0]
+    gradients = _compute_delta_gradient_direct(Ks, Y, deltas, dual_weights)[0]
     scores = _compute_delta_loss(Ks, Y, deltas, dual_weights)
     scores2 = _compute_delta_loss(Ks, Y, deltas2, dual_weights)
 
@@ -125,12 +124,12 @@ def test_delta_gradient_indirect(backend, n_targets_batch):
     loss, dual_weights = compute_loss(deltas)
     loss2, dual_weights2 = compute_loss(deltas2)
 
-    gradients = _compute_delta_gradient(
+    gradients = _compute_delta_gradient_indirect(
         Ks_val,
         Y_val,
         deltas,
         dual_weights,
-        Ks_train=Ks,
+        Ks,
         hyper_gradient_method="conjugate_gradient",
         tol=1e-5,
     )[0]
@@ -184,10 +183,11 @@ def _test_solve_multiple_kernel_ridge_hyper_gradient(
     method="direct",
     initial_deltas=0,
     kernel_ridge="conjugate_gradient",
+    cv=3,
+    cache_split_kernels=False,
 ):
     backend = set_backend(backend)
     Ks, Y, dual_weights, gammas, Ks_val, Y_val, Xs = _create_dataset(backend)
-    cv = 3
     progress_bar = False
 
     # compare bilinear gradient descent and dirichlet sampling
@@ -224,6 +224,7 @@ def _test_solve_multiple_kernel_ridge_hyper_gradient(
                 initial_deltas=initial_deltas,
                 kernel_ridge_method=kernel_ridge,
                 progress_bar=progress_bar,
+                cache_split_kernels=cache_split_kernels,
             )
             cv_scores = backend.asarray(cv_scores)
             scores_1 = cv_scores[cv_scores.sum(axis=1) != 0][-1]
@@ -384,3 +385,252 @@ def test_hyper_gradient_early_stopping(backend):
         progress_bar=False,
     )
     cv_scores = backend.asarray(cv_scores)
+
+
+@pytest.mark.parametrize("kernel_ridge", ["conjugate_gradient", "gradient_descent"])
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_n_jobs(backend, kernel_ridge):
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    results = []
+    for n_jobs in [None, 2]:
+        deltas, _, cv_scores = solve_multiple_kernel_ridge_hyper_gradient(
+            Ks,
+            Y,
+            max_iter=3,
+            cv=3,
+            hyper_gradient_method="conjugate_gradient",
+            kernel_ridge_method=kernel_ridge,
+            progress_bar=False,
+            random_state=0,
+            n_jobs=n_jobs,
+        )
+        results.append((deltas, cv_scores))
+
+    assert_array_almost_equal(results[0][0], results[1][0])
+    assert_array_almost_equal(results[0][1], results[1][1])
+
+
+@pytest.mark.parametrize("cv", [3, 4])
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_cache_split_kernels(backend, cv):
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    results = []
+    for cache_split_kernels in [True, False]:
+        deltas, _, cv_scores = solve_multiple_kernel_ridge_hyper_gradient(
+            Ks,
+            Y,
+            max_iter=3,
+            cv=cv,
+            hyper_gradient_method="conjugate_gradient",
+            kernel_ridge_method="conjugate_gradient",
+            progress_bar=False,
+            random_state=0,
+            cache_split_kernels=cache_split_kernels,
+        )
+        results.append((deltas, cv_scores))
+
+    assert_array_almost_equal(results[0][0], results[1][0])
+    assert_array_almost_equal(results[0][1], results[1][1])
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_delta_gradient_precomputed_chi(backend):
+    backend = set_backend(backend)
+    Ks, Y, dual_weights, gammas, Ks_val, Y_val, _ = _create_dataset(backend)
+    deltas = backend.log(gammas)
+    chi_val = backend.matmul(Ks_val, dual_weights)
+    chi_train = backend.matmul(Ks, dual_weights)
+
+    results_1 = _compute_delta_gradient_indirect(
+        Ks_val, Y_val, deltas, dual_weights, Ks, tol=1e-5,
+        random_state=0,
+    )
+    results_2 = _compute_delta_gradient_indirect(
+        Ks_val, Y_val, deltas, dual_weights, Ks, tol=1e-5,
+        random_state=0, chi_val=chi_val, chi_train=chi_train,
+    )
+    for result_1, result_2 in zip(results_1, results_2):
+        assert_array_almost_equal(result_1, result_2)
+
+
+@pytest.mark.parametrize("only_val", [False, True])
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_compute_chi_folds(backend, only_val):
+    from himalaya.kernel_ridge._hyper_gradient import _compute_chi_folds
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    # 80 samples and 4 splits give splits of equal sizes
+    splits = list(sklearn.model_selection.KFold(4).split(Y))
+    n_samples_train_folds = [len(train) for train, _ in splits]
+    Ks_train_val_folds = [
+        Ks[:, np.concatenate([train, val])[:, None], train]
+        for train, val in splits
+    ]
+    dual_weights_cv = [
+        backend.asarray_like(np.random.randn(len(train), Y.shape[1]), Ks)
+        for train, _ in splits
+    ]
+
+    # compare stacked splits with unstacked splits
+    results_1 = _compute_chi_folds(Ks_train_val_folds, None, dual_weights_cv,
+                                   n_samples_train_folds, only_val=only_val)
+    results_2 = _compute_chi_folds(Ks_train_val_folds,
+                                   backend.stack(Ks_train_val_folds),
+                                   dual_weights_cv, n_samples_train_folds,
+                                   only_val=only_val)
+    for chi_folds_1, chi_folds_2 in zip(results_1, results_2):
+        for chi_1, chi_2 in zip(chi_folds_1, chi_folds_2):
+            if chi_1 is None:
+                assert only_val and chi_2 is None
+            else:
+                assert_array_almost_equal(chi_1, chi_2)
+    for chi_val, dual_weights, (train, val) in zip(results_1[1],
+                                                   dual_weights_cv, splits):
+        reference = backend.matmul(Ks[:, val[:, None], train], dual_weights)
+        assert_array_almost_equal(chi_val, reference)
+
+
+@pytest.mark.parametrize("cv", [3, 4])
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_equal_and_unequal_splits(backend, cv):
+    # with 80 samples, cv=4 gives splits of equal sizes, which are stacked,
+    # while cv=3 gives splits of unequal sizes, which are not stacked
+    _test_solve_multiple_kernel_ridge_hyper_gradient(
+        backend=backend, method="conjugate_gradient", cv=cv,
+        cache_split_kernels=True
+    )
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_refit_method(backend):
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    results = [
+        solve_multiple_kernel_ridge_hyper_gradient(
+            Ks,
+            Y,
+            cv=3,
+            max_iter=2,
+            progress_bar=False,
+            return_weights="dual",
+            refit_method=refit_method,
+            random_state=0,
+        )
+        for refit_method in ["cholesky", "conjugate_gradient", "auto"]
+    ]
+    for result in results[1:]:
+        assert_array_almost_equal(results[0][0], result[0])
+        assert_array_almost_equal(results[0][1], result[1], decimal=3)
+
+    with pytest.raises(ValueError, match="Unknown parameter refit_method"):
+        solve_multiple_kernel_ridge_hyper_gradient(
+            Ks, Y, progress_bar=False, refit_method="wrong"
+        )
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_choose_refit_method(backend):
+    from himalaya.kernel_ridge._hyper_gradient import _choose_refit_method
+    backend = set_backend(backend)
+
+    # one factorization per target: the conjugate gradient is faster
+    deltas = backend.asarray(backend.randn(3, 20))
+    assert _choose_refit_method(deltas, 100) == "conjugate_gradient"
+    # many targets share the same deltas
+    deltas = backend.concatenate([deltas[:, :2]] * 10, 1)
+    assert _choose_refit_method(deltas, 100) == "cholesky"
+    assert _choose_refit_method(deltas, 10000) == "conjugate_gradient"
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_mixed_dtype(backend):
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    results = [
+        solve_multiple_kernel_ridge_hyper_gradient(
+            Ks,
+            Y,
+            cv=3,
+            max_iter=2,
+            progress_bar=False,
+            return_weights="dual",
+            random_state=0,
+            dtype=dtype,
+        )
+        for dtype in [None, "mixed"]
+    ]
+    # the refit and the returned deltas use the dtype of Ks
+    assert results[1][0].dtype == Ks.dtype
+    assert results[1][1].dtype == Ks.dtype
+    assert_array_almost_equal(results[0][0], results[1][0], decimal=3)
+    assert_array_almost_equal(results[0][1], results[1][1], decimal=3)
+
+    with pytest.raises(ValueError, match="Unknown parameter dtype"):
+        solve_multiple_kernel_ridge_hyper_gradient(
+            Ks, Y, progress_bar=False, dtype="float16"
+        )
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_deltas_hessian_finite_differences(backend):
+    from himalaya.kernel_ridge._hyper_gradient import _compute_deltas_hessian
+    backend = set_backend(backend)
+
+    # the hessian is the derivative of the direct gradient over deltas
+    rng = np.random.RandomState(0)
+    n_kernels, n_samples, n_targets = 3, 10, 2
+    chi = backend.asarray(rng.randn(n_kernels, n_samples, n_targets))
+    Y = backend.asarray(rng.randn(n_samples, n_targets))
+    deltas = backend.asarray(rng.randn(n_kernels, n_targets))
+
+    def direct_gradient(deltas):
+        exp_delta = backend.exp(deltas)
+        residuals = backend.einsum("kst,kt->st", chi, exp_delta) - Y
+        return backend.einsum("kst,st->kt", chi, residuals) * exp_delta
+
+    hessian = _compute_deltas_hessian(
+        chi, backend.exp(deltas), direct_gradient(deltas)
+    )
+
+    epsilon = 1e-6
+    for kk in range(n_kernels):
+        step = backend.zeros_like(deltas)
+        step[kk] = epsilon
+        derivative = (
+            direct_gradient(deltas + step) - direct_gradient(deltas - step)
+        ) / (2 * epsilon)
+        for tt in range(n_targets):
+            assert_array_almost_equal(
+                hessian[tt, :, kk], derivative[:, tt], decimal=5
+            )
+
+
+@pytest.mark.parametrize("backend", ALL_BACKENDS)
+def test_hyper_gradient_converged_targets(backend):
+    backend = set_backend(backend)
+    Ks, Y, _, _, _, _, _ = _create_dataset(backend)
+
+    # targets stop being updated once they have converged, independently of
+    # the other targets, hence the results do not depend on the batches
+    results = [
+        solve_multiple_kernel_ridge_hyper_gradient(
+            Ks,
+            Y,
+            cv=3,
+            max_iter=10,
+            tol=1e-1,
+            n_targets_batch=n_targets_batch,
+            progress_bar=False,
+            random_state=0,
+        )
+        for n_targets_batch in [None, 1]
+    ]
+    assert_array_almost_equal(results[0][0], results[1][0])
+    assert_array_almost_equal(results[0][2], results[1][2])
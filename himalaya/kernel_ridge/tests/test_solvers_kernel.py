@@ -12,6 +12,8 @@ from himalaya.utils import assert_array_almost_equal
 from himalaya.kernel_ridge import WEIGHTED_KERNEL_RIDGE_SOLVERS
 from himalaya.kernel_ridge import KERNEL_RIDGE_SOLVERS
 from himalaya.kernel_ridge._solvers import _weighted_kernel_ridge_gradient
+from himalaya.kernel_ridge._solvers import \
+    _solve_weighted_kernel_ridge_conjugate_gradient_splits
 
 KERNEL_RIDGE_SOLVERS['eigenvalues_svd'] = partial(
     KERNEL_RIDGE_SOLVERS['eigenvalues'], method="svd")
@@ -273,3 +275,52 @@ def test_weighted_different_number_of_samples(solver_name, backend):
 
     with pytest.raises(ValueError, match="Kernels must be square"):
         solver(Ks[:, :4, :3], Y[:4], deltas)
+
+
+@pytest.mark.parametrize('backend', ALL_BACKENDS)
+def test_solve_weighted_kernel_ridge_conjugate_gradient_splits(backend):
+    backend = set_backend(backend)
+    Xs, Ks, Y, deltas, dual_weights = _create_dataset(backend, intercept=False)
+    solver = WEIGHTED_KERNEL_RIDGE_SOLVERS["conjugate_gradient"]
+
+    # two independent problems, solved together or separately
+    Ks_stack = backend.stack([Ks, Ks[:, ::-1, ::-1]])
+    Y_stack = backend.stack([Y, Y * 2])
+    c_stack = _solve_weighted_kernel_ridge_conjugate_gradient_splits(
+        Ks_stack, Y_stack, deltas, max_iter=5, tol=None)
+    for kk in range(2):
+        c_kk = solver(Ks_stack[kk], Y_stack[kk], deltas, max_iter=5, tol=None)
+        assert_array_almost_equal(c_stack[kk], c_kk)
+
+    # warm starting from a previous solution
+    c1 = _solve_weighted_kernel_ridge_conjugate_gradient_splits(
+        Ks_stack, Y_stack, deltas, max_iter=5, tol=None,
+        initial_dual_weights=c_stack)
+    for kk in range(2):
+        c_kk = solver(Ks_stack[kk], Y_stack[kk], deltas, max_iter=5, tol=None,
+                      initial_dual_weights=c_stack[kk])
+        assert_array_almost_equal(c1[kk], c_kk)
+
+    # with a tolerance, each problem stops as it would if solved separately
+    for tol in [1e-2, 1e-8]:
+        c_stack = _solve_weighted_kernel_ridge_conjugate_gradient_splits(
+            Ks_stack, Y_stack, deltas, max_iter=100, tol=tol)
+        for kk in range(2):
+            c_kk = solver(Ks_stack[kk], Y_stack[kk], deltas, max_iter=100,
+                          tol=tol)
+            assert_array_almost_equal(c_stack[kk], c_kk)
+
+
+@pytest.mark.parametrize('backend', ALL_BACKENDS)
+def test_solve_weighted_kernel_ridge_cholesky_groups(backend):
+    backend = set_backend(backend)
+    Xs, Ks, Y, deltas, dual_weights = _create_dataset(backend, intercept=False,
+                                                      many_targets=True)
+    solver = WEIGHTED_KERNEL_RIDGE_SOLVERS["cholesky"]
+
+    # targets with identical deltas share the same factorization
+    deltas = backend.concatenate([deltas[:, :2]] * 10, 1)
+    c1 = solver(Ks, Y, deltas)
+    for tt in range(2):
+        c2 = solver(Ks, Y[:, tt::2], deltas[:, tt])
+        assert_array_almost_equal(c1[:, tt::2], c2)
@@ -24,6 +24,31 @@ def test_compute_lipschitz_constants(backend, kernelize):
     assert L.shape[0] == Xs.shape[0]
 
 
+@pytest.mark.parametrize('n_samples', [5, 50])
+@pytest.mark.parametrize('backend', ALL_BACKENDS)
+def test_compute_lipschitz_constants_values(backend, n_samples):
+    # small matrices use exact eigenvalues, larger ones use power iteration
+    backend = set_backend(backend)
+
+    # well-separated singular values, such that power iteration converges
+    random_state = np.random.RandomState(0)
+    n_features = 20
+    n_components = min(n_samples, n_features)
+    singular_values = 2. ** -np.arange(n_components)
+    Xs = []
+    for _ in range(3):
+        U, _ = np.linalg.qr(random_state.randn(n_samples, n_components))
+        V, _ = np.linalg.qr(random_state.randn(n_features, n_components))
+        Xs.append((U * singular_values) @ V.T)
+    Xs = backend.asarray(np.stack(Xs), dtype="float64")
+    L = compute_lipschitz_constants(Xs, "XXT", random_state=0, max_iter=100,
+                                    tol=1e-8)
+
+    kernels = backend.to_numpy(Xs) @ backend.to_numpy(Xs).transpose(0, 2, 1)
+    L_ref = np.linalg.eigvalsh(kernels)[:, -1]
+    assert_array_almost_equal(L / L_ref, np.ones(3), decimal=4)
+
+
 @pytest.mark.parametrize('backend', ALL_BACKENDS)
 def test_compute_lipschitz_constants_error(backend):
     backend = set_backend(backend)
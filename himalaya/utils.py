@@ -5,11 +5,17 @@ import numpy as np
 from .backend import get_backend
 from .validation import check_random_state
 
+#: Matrices up to this size use an exact spectral radius in
+#: compute_lipschitz_constants.
+_MAX_SIZE_EXACT_LIPSCHITZ = 32
 
-def compute_lipschitz_constants(Xs, kernelize="XTX", random_state=None):
+
+def compute_lipschitz_constants(Xs, kernelize="XTX", random_state=None,
+                                max_iter=10, tol=1e-4):
     """Compute Lipschitz constants of gradients of linear regression problems.
 
     Find the largest eigenvalue of X^TX for several X, using power iteration.
+    For small matrices, the eigenvalues are computed exactly instead.
 
     Parameters
     ----------
@@ -17,9 +23,15 @@ def compute_lipschitz_constants(Xs, kernelize="XTX", random_state=None):
             (n_kernels, n_samples, n_samples)
         Multiple linear features or kernels.
     kernelize : str in {"XTX", "XXT", "X"}
-        Whether to consider X^TX, XX^T, or directly X.
+        Whether to consider X^TX, XX^T, or directly X (which must then be
+        symmetric).
     random_state : int, or None
         Random generator seed. Use an int for deterministic search.
+    max_iter : int
+        Maximum number of power iterations.
+    tol : float > 0, or None
+        Tolerance on the relative change of the estimated eigenvalues, used to
+        stop the power iterations early.
 
     Returns
     -------
@@ -41,16 +53,26 @@ def compute_lipschitz_constants(Xs, kernelize="XTX", random_state=None):
     else:
         raise ValueError("Unknown parameter kernelize=%r" % (kernelize, ))
 
+    # small symmetric matrices: the spectral radius is cheaper to compute
+    # exactly than with power iteration
+    if kernels.shape[1] <= _MAX_SIZE_EXACT_LIPSCHITZ:
+        evs = backend.eigvalsh(kernels)
+        return backend.max(backend.abs(evs), axis=1)
+
     # check the random state
     random_generator = check_random_state(random_state)
     ys = random_generator.randn(*(kernels.shape[:2] + (1, )))
 
     ys = backend.asarray_like(ys, Xs)
-    for i in range(10):
-        ys /= backend.norm(ys, axis=1, keepdims=True) + 1e-16
+    evs = backend.norm(ys, axis=1)
+    for i in range(max_iter):
+        ys /= evs[:, :, None] + 1e-16
         ys = backend.matmul(kernels, ys)
-    evs = backend.norm(ys, axis=1)[:, 0]
-    return evs
+        evs_old, evs = evs, backend.norm(ys, axis=1)
+        if tol is not None and i > 0 and backend.max(
+                backend.abs(evs - evs_old) / (evs + 1e-16)) < tol:
+            break
+    return evs[:, 0]
 
 
 def assert_array_almost_equal(x, y, decimal=6, err_msg='', verbose=True):